@@ -1,44 +1,80 @@
-# app.py — versão final consolidada (Render + cachebuster + reload + rotas completas)
+# app.py — versão final consolidada (Render + cache condicional + reload + rotas completas)
 # -----------------------------------------
 # Flask + loader robusto + extrações "inteligentes" da planilha
-# Dep.: Flask, gunicorn, pandas, numpy<2.1, requests, openpyxl
+# Dep.: Flask, gunicorn+gevent, pandas, numpy<2.1, requests, openpyxl
+# Produção: gunicorn app:app -c gunicorn_conf.py (workers gevent, GEVENT=1)
 # ENV:
 #   - GOOGLE_SHEET_CSV_URL  -> .../export?format=csv&gid=XXXX   (prioridade)
 #   - DATA_CACHE_TTL_SECONDS (opcional; default 300)
 # -----------------------------------------
 
-import os, io, time, math, unicodedata, random
+import os
+
+# Com GEVENT=1 (gunicorn -k gevent, ver gunicorn_conf.py) o patch precisa
+# acontecer antes de importar requests/urllib3 para o socket cooperar
+if os.getenv("GEVENT"):
+    from gevent import monkey
+    monkey.patch_all()
+
+import io, re, gzip, json, time, math, queue, hashlib, logging, logging.handlers, unicodedata, threading
 from datetime import datetime, timedelta
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 import requests
 from flask import Flask, render_template, request
+from jinja2 import FileSystemBytecodeCache
+
+from utils import HTTP_SESSION
+
+# pyarrow é opcional: parser CSV em C++ multithread (bem mais rápido que o
+# tokenizer do pandas em planilhas grandes). Sem ele, caímos no pandas puro.
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except Exception:
+    pa = None
+    pacsv = None
 
 # ---------- Flask ----------
 app = Flask(__name__)
 
 # ---------- Filtros Jinja ----------
+# Casos "vazios" do dash em um frozenset: um teste de pertinência no lugar
+# de strip().lower() + duas comparações por célula renderizada
+_EMPTY_SENTINELS = frozenset({"", "nan", "NaN", "NAN", "None", "none", "<NA>"})
+
 @app.template_filter('dash')
 def dash(value):
+    if value is None:
+        return "—"
+    if type(value) is str:  # fast path: a maioria das células já chega str
+        s = value.strip()
+        return "—" if s in _EMPTY_SENTINELS else s
     try:
-        if value is None: return "—"
         s = str(value).strip()
-        if s == "" or s.lower() == "nan": return "—"
-        return s
+        return "—" if s in _EMPTY_SENTINELS else s
     except Exception:
         return "—"
 
+# Colunas de moeda repetem muito valor (R$ 0,00, totais): o lru_cache
+# transforma formatações repetidas em um lookup de dict
+@lru_cache(maxsize=4096)
+def _fmt_money(num: float) -> str:
+    return f"R$ {num:,.2f}".translate(_BRL_TRANS)
+
 @app.template_filter('br_money')
 def br_money(value):
+    # usa o regex pré-compilado e o translate de separadores (1 chamada C)
+    # definidos no módulo, em vez de 3-4 .replace() por célula renderizada
     try:
         if value is None: return "—"
         if isinstance(value, float) and math.isnan(value): return "—"
+        if isinstance(value, (int, float)):
+            return _fmt_money(float(value))
         s = str(value).strip()
         if s.startswith("R$"): return s
-        if isinstance(value, (int, float)):
-            return f"R$ {value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-        raw = s.replace("R$", "").replace(".", "").replace(",", ".")
-        num = float(raw)
-        return f"R$ {num:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        return _fmt_money(float(_CURRENCY_RE.sub("", s).replace(",", ".")))
     except Exception:
         return dash(value)
 
@@ -56,92 +92,531 @@ def _ui_globals():
         "data_mode":   globals().get("DATA_MODE")
     }
 
+# ---------- Cache HTTP das páginas ----------
+# As páginas só mudam quando os dados trocam de época: ETag = (gen, loaded_at)
+# deixa cliente/CDN revalidarem com 304, o Cache-Control expõe o TTL restante
+# e o HTML (tabelas/série embutidas) viaja gzipado — gzip da stdlib mesmo,
+# sem dependência nova; o transporte já negocia o Accept-Encoding do cliente
+@app.after_request
+def _http_cache_headers(resp):
+    try:
+        if resp.status_code != 200 or resp.direct_passthrough or resp.mimetype != "text/html":
+            return resp
+        # Só as páginas GET de dados são cacheáveis; /reload é uma ação do
+        # operador — cache servindo a confirmação antiga engoliria o refresh
+        if request.method != "GET":
+            return resp
+        if request.path == "/reload":
+            resp.headers["Cache-Control"] = "no-store"
+            return resp
+        # Vary sempre que a resposta é elegível a compressão (não só quando
+        # ela aconteceu): sem isso um cache compartilhado que guardou a
+        # variante sem gzip a serviria para todo mundo
+        resp.headers.add("Vary", "Accept-Encoding")
+        loaded = _DF_CACHE["loaded_at"]
+        if loaded is not None:
+            resp.set_etag(f"{_DF_CACHE['gen']}-{loaded.timestamp():.0f}")
+            restante = max(0, int(_DF_CACHE["deadline"] - time.monotonic()))
+            resp.headers["Cache-Control"] = f"public, max-age={restante}, stale-while-revalidate=60"
+            resp.make_conditional(request)  # If-None-Match casou -> 304 sem corpo
+            if resp.status_code == 304:
+                return resp
+        if "gzip" in request.headers.get("Accept-Encoding", "") and len(resp.get_data()) > 500:
+            resp.set_data(gzip.compress(resp.get_data(), 6))
+            resp.headers["Content-Encoding"] = "gzip"
+            resp.headers["Content-Length"] = str(len(resp.get_data()))
+    except Exception as e:
+        _log(f"_http_cache_headers erro: {e}")
+    return resp
+
 # ---------- Loader ----------
 GOOGLE_SHEET_CSV_URL = os.getenv("GOOGLE_SHEET_CSV_URL", "").strip()
 CACHE_TTL_SECONDS = int(os.getenv("DATA_CACHE_TTL_SECONDS", "300"))
 CACHE_DIR = os.path.join(os.getcwd(), "data")
 os.makedirs(CACHE_DIR, exist_ok=True)
 
-def _log(msg: str):
-    print(f"[DATA] {datetime.utcnow().isoformat()}Z | {msg}", flush=True)
+# Bytecode cache do Jinja: cada worker pula lexer/parser dos templates já
+# compilados por outro worker; sem FLASK_DEBUG também pula o stat() por render
+_JINJA_BC_DIR = os.path.join(CACHE_DIR, "jinja_bc")
+os.makedirs(_JINJA_BC_DIR, exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory=_JINJA_BC_DIR)
+if not os.getenv("FLASK_DEBUG"):
+    app.jinja_env.auto_reload = False
+
+# logging com nível: mensagens DEBUG somem sem custo de formatação/flush
+# (o print com isoformat rodava em todo caminho, inclusive nos cache hits).
+# QueueHandler: o caminho quente só enfileira; quem toca o stdio (lock +
+# flush) é a thread do QueueListener, fora do request
+_logger = logging.getLogger("data")
+if not _logger.handlers:
+    _stream = logging.StreamHandler()
+    _stream.setFormatter(logging.Formatter("[DATA] %(asctime)s | %(message)s"))
+    _LOG_QUEUE = queue.SimpleQueue()
+    _logger.addHandler(logging.handlers.QueueHandler(_LOG_QUEUE))
+    _LOG_LISTENER = logging.handlers.QueueListener(_LOG_QUEUE, _stream)
+    _LOG_LISTENER.start()
+_logger.setLevel(os.getenv("DATA_LOG_LEVEL", "INFO").upper())
+
+def _log(msg: str, level: int = logging.INFO):
+    _logger.log(level, msg)
+
+class NotModified(Exception):
+    """Servidor respondeu 304: o conteúdo remoto não mudou desde o último download."""
+
+# Cache em disco do DataFrame já parseado (sobrevive a restart de worker)
+PARQUET_PATH = os.path.join(CACHE_DIR, "sheet.parquet")
+ETAG_PATH = os.path.join(CACHE_DIR, "etag.json")
+# Arrow IPC sem compressão: workers leem via mmap e compartilham as páginas
+# físicas entre processos (1 download serve os N workers do gunicorn)
+ARROW_PATH = os.path.join(CACHE_DIR, "sheet.arrow")
+_ARROW_SEEN = {"mtime": 0.0}
+
+def _read_cache_meta() -> dict:
+    try:
+        with open(ETAG_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
 
-def _download_to_bytes(url: str, timeout: int = 45, max_attempts: int = 3) -> bytes:
-    """Baixa URL com cachebuster para evitar cache do Google Sheets"""
-    last_err = None
-    for i in range(1, max_attempts + 1):
+def _write_cache_meta(meta: dict):
+    try:
+        with open(ETAG_PATH, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+    except Exception as e:
+        _log(f"Falha ao gravar meta do cache: {e}")
+
+def _write_parquet_cache(df: pd.DataFrame, headers, content_length: int = 0,
+                         content_hash: str = ""):
+    try:
+        out = df.copy()
+        out.columns = [str(c) for c in out.columns]  # parquet exige nomes string
+        out.to_parquet(PARQUET_PATH, engine="pyarrow", compression="zstd")
+        _write_cache_meta({
+            "etag": headers.get("ETag", ""),
+            "last_modified": headers.get("Last-Modified", ""),
+            "content_length": content_length,
+            "content_hash": content_hash,
+        })
+        _log(f"Parquet gravado em {PARQUET_PATH}")
+    except Exception as e:
+        _log(f"Falha ao gravar parquet: {e}")
+
+def _write_arrow_cache(df: pd.DataFrame):
+    if pa is None:
+        return
+    try:
+        import pyarrow.feather as feather
+        out = df.copy()
+        out.columns = [str(c) for c in out.columns]
+        tmp = ARROW_PATH + ".tmp"
+        feather.write_feather(out, tmp, compression="uncompressed")
+        os.replace(tmp, ARROW_PATH)  # publicação atômica para os outros workers
+        _ARROW_SEEN["mtime"] = os.path.getmtime(ARROW_PATH)
+    except Exception as e:
+        _log(f"Falha ao gravar arrow: {e}")
+
+def _read_arrow_cache() -> pd.DataFrame:
+    import pyarrow.feather as feather
+    df = feather.read_feather(ARROW_PATH, memory_map=True)
+    df.columns = range(df.shape[1])
+    _log(f"Arrow mmap lido do cache: linhas={len(df)}")
+    return df
+
+def _read_parquet_cache() -> pd.DataFrame:
+    df = pd.read_parquet(PARQUET_PATH, engine="pyarrow")
+    df.columns = range(df.shape[1])
+    _log(f"Parquet lido do cache: linhas={len(df)}")
+    return df
+
+# Session com pool de conexões compartilhada com utils.py: reaproveita o
+# TCP+TLS entre reloads e deixa o retry/backoff com o urllib3
+_SESSION = HTTP_SESSION
+
+def _download_to_bytes(url: str, timeout: int = 45,
+                       etag: str = "", last_modified: str = "", force: bool = False):
+    """Baixa URL via Session pooled com streaming e gzip no transporte.
+
+    A URL vai limpa (sem cachebuster aleatório: ele impedia qualquer 304 e
+    revalidação de CDN). Envia If-None-Match/If-Modified-Since quando
+    conhecidos; um 304 vira NotModified para o chamador reaproveitar o
+    parquet local. Com force=True (/reload) ignora validadores e anexa um
+    único refresh=1. Retorna (bytes, headers_da_resposta).
+    """
+    headers = {}  # Accept-Encoding já vai no header default da Session
+    if not force:
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+    final_url = f"{url}&refresh=1" if force else url
+    _log(f"Baixando: {final_url}")
+    r = _SESSION.get(final_url, timeout=timeout, headers=headers, stream=True)
+    if r.status_code == 304:
+        raise NotModified()
+    r.raise_for_status()
+    # bytearray cresce amortizado e o iter_content já descompacta o gzip;
+    # evita o buffer contíguo único de r.content + cópia do BytesIO
+    buf = bytearray()
+    for chunk in r.iter_content(chunk_size=1 << 16):
+        buf.extend(chunk)
+    content = bytes(buf)
+    _log(f"Download OK: {len(content)} bytes")
+    return content, r.headers
+
+def _parse_csv_bytes(content: bytes) -> pd.DataFrame:
+    """Converte bytes CSV em DataFrame sem header (colunas 0..N)."""
+    if pacsv is not None:
         try:
-            cachebuster = random.randint(0, 999999)
-            final_url = f"{url}&cachebuster={cachebuster}"
-            _log(f"Baixando ({i}/{max_attempts}): {final_url}")
-            r = requests.get(final_url, timeout=timeout)
-            r.raise_for_status()
-            _log(f"Download OK: {len(r.content)} bytes (cachebuster={cachebuster})")
-            return r.content
+            table = pacsv.read_csv(
+                pa.BufferReader(content),
+                read_options=pacsv.ReadOptions(autogenerate_column_names=True, block_size=1 << 20),
+                parse_options=pacsv.ParseOptions(delimiter=","),
+                # células vazias viram null (mesma semântica do pd.read_csv),
+                # senão as máscaras isna()/dropna de fim de seção não enxergam
+                convert_options=pacsv.ConvertOptions(strings_can_be_null=True),
+            )
+            # split_blocks/self_destruct: entrega colunas quase zero-copy e
+            # libera os buffers Arrow durante a conversão (menos pico de RAM)
+            df = table.to_pandas(split_blocks=True, self_destruct=True)
+            df.columns = range(df.shape[1])  # mesmo formato do header=None
+            return df
         except Exception as e:
-            last_err = e
-            time.sleep(2 ** i)
-    raise last_err
-
-def _fetch_google_csv(url: str) -> pd.DataFrame:
-    _log("Lendo Google Sheet (CSV)")
-    text = _download_to_bytes(url).decode("utf-8", errors="replace")
-    df = pd.read_csv(io.StringIO(text), header=None)
+            _log(f"pyarrow falhou ({e}); usando parser do pandas")
+    # bytes direto no parser C do pandas: sem decode para str + StringIO
+    # (uma cópia e um passe de UTF-8 a menos no pico de memória)
+    return pd.read_csv(io.BytesIO(content), header=None,
+                       encoding="utf-8", encoding_errors="replace", low_memory=False)
+
+def _fetch_google_csv(url: str, force: bool = False) -> pd.DataFrame:
+    _log("Lendo Google Sheet (CSV)", logging.DEBUG)
+    meta = _read_cache_meta()
+    try:
+        content, resp_headers = _download_to_bytes(
+            url, etag=meta.get("etag", ""), last_modified=meta.get("last_modified", ""),
+            force=force)
+    except NotModified:
+        if _DF_CACHE["df"] is not None:
+            _log("Planilha não mudou (304); revalidado sem download")
+            return _DF_CACHE["df"]
+        _log("Planilha não mudou (304); reaproveitando parquet local")
+        return _read_parquet_cache()
+    except Exception as e:
+        # Fonte fora do ar: degrada para o último dado bom em vez de
+        # devolver dashboard vazio (o parquet é o last-good já parseado)
+        if _DF_CACHE["df"] is not None:
+            _log(f"Download falhou ({e}); mantendo último dado bom em memória")
+            return _DF_CACHE["df"]
+        if os.path.exists(PARQUET_PATH):
+            _log(f"Download falhou ({e}); restaurando last-good do parquet")
+            return _read_parquet_cache()
+        raise
+    # Mesmo sem 304 (o Sheets nem sempre honra validadores), um fingerprint
+    # barato do corpo evita re-parsear quando o conteúdo não mudou
+    digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+    if digest == meta.get("content_hash") and _DF_CACHE["df"] is not None and not force:
+        _log("Corpo idêntico ao anterior (hash); pulando o parse")
+        return _DF_CACHE["df"]
+    df = _parse_csv_bytes(content)
     _log(f"CSV lido: linhas={len(df)} colunas={df.shape[1]}")
+    _write_parquet_cache(df, resp_headers, content_length=len(content), content_hash=digest)
+    _write_arrow_cache(df)
     return df
 
-_DF_CACHE = {"df": None, "loaded_at": None, "mode": None}
+# "gen" cresce só quando o DataFrame realmente troca (revalidação 304 mantém
+# o mesmo objeto/geração, então os derivados memoizados continuam válidos)
+_DF_CACHE = {"df": None, "loaded_at": None, "mode": None, "gen": 0, "deadline": 0.0}
 
-def load_dataframe() -> pd.DataFrame:
+def load_dataframe(force: bool = False) -> pd.DataFrame:
     if not GOOGLE_SHEET_CSV_URL:
         _log("Nenhuma URL de planilha configurada.")
         return pd.DataFrame()
-    df = _fetch_google_csv(GOOGLE_SHEET_CSV_URL)
+    if not force and pa is not None:
+        # Outro worker já baixou/parseou dentro do TTL? Lê o arrow via mmap
+        # em vez de repetir download+parse neste processo
+        try:
+            mtime = os.path.getmtime(ARROW_PATH)
+            if mtime > _ARROW_SEEN["mtime"] and (time.time() - mtime) < CACHE_TTL_SECONDS:
+                df = _read_arrow_cache()
+                _ARROW_SEEN["mtime"] = mtime
+                globals()["LAST_LOADED"] = datetime.utcfromtimestamp(mtime)
+                globals()["DATA_MODE"]   = "arrow-mmap"
+                return df
+        except OSError:
+            pass
+        except Exception as e:
+            _log(f"Arrow mmap falhou ({e}); baixando normalmente")
+    df = _fetch_google_csv(GOOGLE_SHEET_CSV_URL, force=force)
     globals()["LAST_LOADED"] = datetime.utcnow()
     globals()["DATA_MODE"]   = "google-csv"
     return df
 
-def get_data() -> pd.DataFrame:
-    now = datetime.utcnow()
-    if (_DF_CACHE["df"] is None or _DF_CACHE["loaded_at"] is None or
-        (now - _DF_CACHE["loaded_at"]) > timedelta(seconds=CACHE_TTL_SECONDS)):
-        _log("Recarregando dados (cache expirado ou inexistente)...")
-        _DF_CACHE["df"] = load_dataframe()
-        _DF_CACHE["loaded_at"] = now
+# Refresh em background (stale-while-revalidate): TTL vencido serve o dado
+# velho na hora e renova numa thread; só o primeiro request frio bloqueia
+_REFRESH_LOCK = threading.Lock()
+
+def _refresh_async():
+    try:
+        df = load_dataframe()
+        if df is not _DF_CACHE["df"]:
+            _DF_CACHE["df"] = df
+            _DF_CACHE["gen"] += 1
+        _DF_CACHE["loaded_at"] = datetime.utcnow()
+        _DF_CACHE["deadline"] = time.monotonic() + CACHE_TTL_SECONDS
         _DF_CACHE["mode"] = "google-csv"
-        _log(f"Cache atualizado | TTL={CACHE_TTL_SECONDS}s | mode={_DF_CACHE['mode']}")
-    else:
-        age = int((now - _DF_CACHE["loaded_at"]).total_seconds())
-        _log(f"Usando cache (idade={age}s / TTL={CACHE_TTL_SECONDS}s)")
-    return _DF_CACHE["df"]
+        _log(f"Refresh em background concluído | TTL={CACHE_TTL_SECONDS}s")
+    except Exception as e:
+        _log(f"Refresh em background falhou: {e}")
+    finally:
+        _REFRESH_LOCK.release()
+
+def get_data() -> pd.DataFrame:
+    # Hot path: uma comparação de float (time.monotonic) contra o deadline,
+    # sem alocar datetime/timedelta a cada request
+    df = _DF_CACHE["df"]
+    if df is not None:
+        if time.monotonic() < _DF_CACHE["deadline"]:
+            return df
+        # Expirou: serve o stale e dispara no máximo 1 refresh por vez
+        if _REFRESH_LOCK.acquire(blocking=False):
+            _log("Cache expirado; servindo stale e renovando em background...")
+            threading.Thread(target=_refresh_async, daemon=True).start()
+        return df
+    # Cache frio (primeiro request do worker): carrega bloqueando, com
+    # double-check sob o lock para threads concorrentes não baixarem N vezes
+    with _REFRESH_LOCK:
+        if _DF_CACHE["df"] is None:
+            _log("Recarregando dados (cache inexistente)...")
+            _DF_CACHE["df"] = load_dataframe()
+            _DF_CACHE["gen"] += 1
+            _DF_CACHE["loaded_at"] = datetime.utcnow()
+            _DF_CACHE["deadline"] = time.monotonic() + CACHE_TTL_SECONDS
+            _DF_CACHE["mode"] = "google-csv"
+            _log(f"Cache atualizado | TTL={CACHE_TTL_SECONDS}s | mode={_DF_CACHE['mode']}")
+        return _DF_CACHE["df"]
 
 # ---------- Funções analíticas ----------
+# Marcadores de seção conhecidos na coluna 0 da planilha. A alternação
+# compilada acha todos numa única varredura da coluna (O(linhas), e não
+# O(marcadores x linhas) com um find por marcador)
+_SECTION_MARKERS = ("vendas_realizadas", "progecao_de_resultados")
+_SECTION_RE = re.compile("(" + "|".join(map(re.escape, _SECTION_MARKERS)) + ")")
+
+def _norm_unicode(s: pd.Series) -> "np.ndarray":
+    """Coluna -> array numpy <U normalizado (sem acentos, strip/lower).
+
+    O fold de acentos roda vetorizado na cadeia .str do pandas (NFKD +
+    encode ascii/ignore), não célula a célula com unicodedata em Python;
+    de quebra os marcadores de seção casam mesmo se a planilha vier
+    acentuada ("projeção" ~ "progecao")."""
+    vals = (s.astype(str)
+             .str.normalize("NFKD")
+             .str.encode("ascii", "ignore").str.decode("ascii")
+             .str.strip().str.lower().fillna("").tolist())
+    return np.asarray(vals, dtype=str)
+
+# Slot único por DataFrame (mesmo padrão do _DERIVED): attrs não serve de
+# cache aqui porque o pandas propaga attrs para todo frame derivado e um
+# ndarray lá dentro quebra o __finalize__ do concat e os metadados do Arrow
+_COL0_CACHE = {"key": None, "arr": None}
+_BLANK_CACHE = {"key": None, "arr": None}
+
+def _row_blank(df: pd.DataFrame) -> "np.ndarray":
+    """Máscara bool de linhas 100% vazias, computada 1x por DataFrame.
+
+    Os terminadores de seção fatiam este vetor em vez de refazer
+    isna().all(axis=1) sobre a grade inteira em cada extract_*."""
+    key = id(df)
+    if _BLANK_CACHE["key"] != key:
+        _BLANK_CACHE["arr"] = df.isna().all(axis=1).to_numpy()
+        _BLANK_CACHE["key"] = key
+    return _BLANK_CACHE["arr"]
+
+def _col0_norm(df: pd.DataFrame) -> "np.ndarray":
+    """Coluna 0 normalizada, computada 1x por DataFrame.
+
+    _split_sections e os extract_* consomem a mesma coluna; sem o cache
+    cada um refazia astype(str)+strip+lower sobre a planilha inteira."""
+    key = id(df)
+    if _COL0_CACHE["key"] != key:
+        _COL0_CACHE["arr"] = _norm_unicode(df.iloc[:, 0])
+        _COL0_CACHE["key"] = key
+    return _COL0_CACHE["arr"]
+
+def _split_sections(df: pd.DataFrame) -> dict:
+    """Normaliza a coluna 0 uma única vez e indexa onde cada seção começa."""
+    sections = {}
+    try:
+        if df.empty:
+            return sections
+        col0 = _col0_norm(df)
+        hits = pd.Series(col0).str.extract(_SECTION_RE, expand=False).to_numpy()
+        for i in np.flatnonzero(pd.notna(hits)):
+            sections.setdefault(str(hits[i]), int(i))  # 1ª ocorrência vence
+    except Exception as e:
+        _log(f"_split_sections erro: {e}")
+    return sections
+
 def extract_kv_metrics(df: pd.DataFrame):
     kv = {}
     try:
-        for i in range(len(df)):
-            row = [str(x).strip() for x in df.iloc[i].tolist() if str(x).strip()]
-            if len(row) >= 2:
-                kv[row[0].lower().replace(" ", "_")] = row[1]
+        if df.empty:
+            return kv
+        # stack()+dropna descarta NaN de verdade e preserva a ordem das linhas;
+        # o cumcount marca a posição de cada célula não-vazia dentro da linha.
+        # Substitui o loop iterrows/iloc por célula (tupla + dispatch Python
+        # por linha) por meia dúzia de passes vetorizados.
+        st = df.stack().dropna().astype(str).str.strip()
+        st = st[st != ""]
+        pos = st.groupby(level=0).cumcount().to_numpy()
+        first = st[pos == 0]
+        second = st[pos == 1]
+        chave = pd.Series(first.to_numpy(), index=first.index.get_level_values(0))
+        valor = pd.Series(second.to_numpy(), index=second.index.get_level_values(0))
+        chave = (chave.loc[valor.index]  # só linhas com >= 2 células úteis
+                      .str.lower().str.replace(" ", "_", regex=False))
+        kv = dict(zip(chave.tolist(), valor.tolist()))
     except Exception as e:
         _log(f"extract_kv_metrics erro: {e}")
     return kv
 
-def extract_vendas_realizadas(df: pd.DataFrame):
+# Limpeza de moeda PT-BR em um único passe de regex (em vez de vários
+# .str.replace encadeados, que alocam uma Series intermediária cada um)
+_CURRENCY_RE = re.compile(r"R\$|\.|\s")
+
+# Com pyarrow, o str.replace roda no kernel C do Arrow em vez do loop objeto
+_STR_DTYPE = "string[pyarrow]" if pa is not None else "string"
+
+def _parse_currency_series(s: pd.Series) -> pd.Series:
+    """'R$ 1.234,56' -> 1234.56 (vetorizado; inválidos viram 0.0)"""
+    limpo = (s.astype(_STR_DTYPE)
+              .str.replace(_CURRENCY_RE, "", regex=True)
+              .str.replace(",", ".", regex=False))
+    # downcast="float" entrega float32 quando cabe: metade dos bytes movidos
+    # nos sum()/groupby de moeda, sem perda prática para valores em reais
+    return pd.to_numeric(pd.to_numeric(limpo, errors="coerce").fillna(0.0), downcast="float")
+
+def extract_vendas_realizadas(df: pd.DataFrame, sections: dict = None):
     try:
-        idx = df[df[0].astype(str).str.contains("vendas_realizadas", case=False, na=False)].index
-        if len(idx) == 0:
+        if sections is None:
+            sections = _split_sections(df)
+        if "vendas_realizadas" not in sections:
             return pd.DataFrame()
-        start = idx[0] + 2
-        sub = df.iloc[start:].dropna(how="all").reset_index(drop=True)
+        start = sections["vendas_realizadas"] + 2
+        # Fim da seção achado vetorizado: primeira linha "Total..." ou linha
+        # toda vazia depois do header (sem loop Python linha a linha)
+        body = df.iloc[start + 1:]
+        col_a = _col0_norm(df)[start + 1:]  # fatias dos vetores já computados
+        term = np.char.startswith(col_a, "total") | _row_blank(df)[start + 1:]
+        n_rows = int(np.argmax(term)) if term.any() else len(body)
+        sub = df.iloc[start:start + 1 + n_rows].reset_index(drop=True)
         sub.columns = sub.iloc[0]
         sub = sub[1:]
         if "Data" in sub.columns:
             sub["Data"] = pd.to_datetime(sub["Data"], errors="coerce", dayfirst=True)
+        for col in ("valor-venda", "valor_venda", "valor_liquido"):
+            if col in sub.columns:
+                sub[col] = _parse_currency_series(sub[col])
+        # Texto de baixa cardinalidade vira categoria: groupby usa códigos
+        # int em vez de hashing de strings e a memória do cache encolhe
+        for col in ("Profissão", "Vendedora", "estado_contato"):
+            if col in sub.columns:
+                sub[col] = sub[col].astype("category")
         return sub
     except Exception as e:
         _log(f"extract_vendas_realizadas erro: {e}")
         return pd.DataFrame()
 
+# "1,234.56" -> "1.234,56" com uma única chamada C de translate
+_BRL_TRANS = str.maketrans({",": ".", ".": ","})
+
+def _format_brl_series(s: pd.Series) -> pd.Series:
+    """Formata uma coluna inteira em R$ PT-BR de uma vez (1x por reload),
+    em vez de pagar o filtro br_money célula a célula em cada render."""
+    num = pd.to_numeric(s, errors="coerce")
+    return num.map(lambda v: "—" if pd.isna(v) else f"R$ {v:,.2f}".translate(_BRL_TRANS))
+
+def _records_fast(df: pd.DataFrame) -> list:
+    """DataFrame -> lista de dicts via Arrow (C++) quando disponível.
+
+    to_dict(orient=\"records\") cria cada dict/escalar em Python puro;
+    o caminho Arrow faz a conversão em bloco. Nomes de coluna viram str
+    (exigência do Arrow — e os templates já tratam chaves como texto).
+    """
+    out = df.copy()
+    out.columns = [str(c) for c in out.columns]
+    if pa is not None:
+        try:
+            return pa.Table.from_pandas(out, preserve_index=False).to_pylist()
+        except Exception as e:
+            _log(f"_records_fast caiu no pandas: {e}")
+    return out.to_dict(orient="records")
+
+def build_vendas_payload(vendas: pd.DataFrame) -> dict:
+    """Monta o contexto pronto do /acompanhamento-vendas (kpis, série diária, amostra)."""
+    vazio = {"has_data": False, "kpis": {}, "series": [], "table": []}
+    try:
+        if vendas is None or vendas.empty:
+            return vazio
+        if "Data" not in vendas.columns or "valor_liquido" not in vendas.columns:
+            return vazio
+        tmp = vendas.dropna(subset=["Data"])
+        series = []
+        if len(tmp):
+            # Soma por dia direto em int64 (datetime64[D]) + reduceat, sem o
+            # groupby com chaves datetime.date objeto a objeto do .dt.date
+            days = tmp["Data"].to_numpy("datetime64[D]")
+            vals = tmp["valor_liquido"].to_numpy(np.float64)
+            order = np.argsort(days, kind="stable")
+            days_s, vals_s = days[order], vals[order]
+            uniq, starts = np.unique(days_s, return_index=True)
+            sums = np.add.reduceat(vals_s, starts)
+            series = [{"x": str(d), "y": float(v)} for d, v in zip(uniq, sums)]
+        # astype(object) (já copia) antes do fillna: nas colunas categóricas
+        # o fillna("") estoura com "" fora das categorias e o except de fora
+        # engoliria a página inteira como "sem dados"
+        amostra = vendas.head(50).astype(object)
+        for col in ("valor-venda", "valor_venda", "valor_liquido"):
+            if col in amostra.columns:
+                amostra[col] = _format_brl_series(amostra[col])
+        table = _records_fast(amostra.fillna("").astype(str))
+        kpis = {"qtd": len(vendas), "liquido": float(vendas["valor_liquido"].sum())}
+        return {"has_data": True, "kpis": kpis, "series": series, "table": table}
+    except Exception as e:
+        _log(f"build_vendas_payload erro: {e}")
+        return vazio
+
+def extract_projecao(df: pd.DataFrame, sections: dict = None):
+    try:
+        if sections is None:
+            sections = _split_sections(df)
+        if "progecao_de_resultados" not in sections:
+            return pd.DataFrame()
+        start = sections["progecao_de_resultados"] + 2
+        # Terminador = duas linhas vazias seguidas, achado com a máscara de
+        # nulos computada uma única vez (nada de .iloc[end].isna() por linha)
+        body = df.iloc[start + 1:]
+        blank = _row_blank(df)[start + 1:]
+        double_blank = blank[1:] & blank[:-1]
+        n_rows = int(np.argmax(double_blank)) if double_blank.any() else len(body)
+        sub = df.iloc[start:start + 1 + n_rows].reset_index(drop=True)
+        header = sub.iloc[0].tolist()
+        cols = []
+        for j, c in enumerate(header):
+            name = str(c).strip()
+            cols.append(name if name and name.lower() != "nan" else f"col_{j}")
+        sub.columns = cols
+        sub = sub[1:].dropna(how="all").reset_index(drop=True)
+        if len(sub):
+            # Colunas 100% vazias (sobra da largura da grade) saem com um
+            # único strip vetorizado sobre o buffer 2D, não coluna a coluna
+            arr = np.asarray(sub.astype(str).where(sub.notna(), "").values.tolist(), dtype=str)
+            empty_cols = (np.char.strip(arr) == "").all(axis=0)
+            sub = sub.loc[:, ~empty_cols]
+        return sub
+    except Exception as e:
+        _log(f"extract_projecao erro: {e}")
+        return pd.DataFrame()
+
 def build_channel_cards(kv: dict):
     canais = []
     for canal in ["Facebook", "Google Ads", "YouTube"]:
@@ -183,16 +658,47 @@ def build_metas_status(kv, qtd_vendas, cpl, inv, orc):
             "nome": "CPL Médio",
             "atual": cpl,
             "meta": meta_cpl,
+            # CPL é "menor melhor": atingimento 100% quando bate a meta
+            "atingimento": meta_cpl / cpl * 100,
             "status": "verde" if cpl <= meta_cpl else "vermelho"
         })
     return metas
 
+# ---------- Cache de derivados ----------
+# As extrações (kv, vendas) são caras e determinísticas por DataFrame:
+# memoizamos por (id(df), gen) para rodarem 1x por troca real de dados, não
+# 1x por request — o gen sobrevive a revalidações 304 de propósito.
+_DERIVED = {"key": None, "kv": None, "vendas": None, "sections": None,
+            "vendas_payload": None, "projecao": None, "projecao_table": None,
+            "debug_rows": None, "debug_cols": None}
+_DERIVED_LOCK = threading.Lock()
+
+def get_derived(df: pd.DataFrame) -> dict:
+    key = (id(df), _DF_CACHE["gen"])
+    if _DERIVED["key"] != key:
+        with _DERIVED_LOCK:
+            if _DERIVED["key"] != key:  # double-check: outro thread pode ter preenchido
+                sections = _split_sections(df)
+                _DERIVED["sections"] = sections
+                _DERIVED["kv"] = extract_kv_metrics(df)
+                _DERIVED["vendas"] = extract_vendas_realizadas(df, sections)
+                _DERIVED["vendas_payload"] = build_vendas_payload(_DERIVED["vendas"])
+                proj = extract_projecao(df, sections)
+                _DERIVED["projecao"] = proj
+                _DERIVED["projecao_table"] = [] if proj.empty else _records_fast(proj.fillna("").astype(str))
+                _DERIVED["debug_rows"] = _records_fast(df.head(20).fillna("").astype(str))
+                _DERIVED["debug_cols"] = [str(c) for c in range(df.shape[1])]
+                _DERIVED["key"] = key
+    return _DERIVED
+
 # ---------- Endpoint manual ----------
 @app.get("/reload")
 def reload_data():
     _log("Recarregando dados manualmente via /reload...")
-    _DF_CACHE["df"] = load_dataframe()
+    _DF_CACHE["df"] = load_dataframe(force=True)
+    _DF_CACHE["gen"] += 1
     _DF_CACHE["loaded_at"] = datetime.utcnow()
+    _DF_CACHE["deadline"] = time.monotonic() + CACHE_TTL_SECONDS
     _DF_CACHE["mode"] = "google-csv"
     return f"✅ Dados recarregados com sucesso em {datetime.now().strftime('%H:%M:%S')}"
 
@@ -200,7 +706,7 @@ def reload_data():
 @app.get("/")
 def index():
     df = get_data()
-    vendas = extract_vendas_realizadas(df)
+    vendas = get_derived(df)["vendas"]
     kpi_vendas = 0 if vendas.empty else len(vendas)
     kpi_fatur = float(vendas["valor_liquido"].sum()) if ("valor_liquido" in vendas.columns) else 0.0
     return render_template("index.html",
@@ -212,8 +718,9 @@ def index():
 @app.get("/visao-geral")
 def visao_geral():
     df = get_data()
-    vendas = extract_vendas_realizadas(df)
-    kv = extract_kv_metrics(df)
+    derived = get_derived(df)
+    vendas = derived["vendas"]
+    kv = derived["kv"]
 
     def _safe_float(val):
         try:
@@ -238,7 +745,7 @@ def visao_geral():
         delta_orc=delta_orc or 0.0,
         orc_meta=orc_meta or 0.0,
         inv_usado=inv_usado or 0.0,
-        roas=kv.get("roas_geral") or 0.0,
+        roas=_safe_float(kv.get("roas_geral")) or 0.0,
     )
 
     canais = build_channel_cards(kv)
@@ -253,6 +760,12 @@ def visao_geral():
         **_ui_globals()
     )
 
+@app.get("/acompanhamento-vendas")
+def acompanhamento_vendas():
+    df = get_data()
+    payload = get_derived(df)["vendas_payload"]
+    return render_template("acompanhamento_vendas.html", **payload, **_ui_globals())
+
 # ---------- Rotas complementares ----------
 @app.get("/origem-conversao")
 def origem_conversao():
@@ -267,12 +780,22 @@ def profissao_por_canal():
 @app.get("/analise-regional")
 def analise_regional():
     df = get_data()
-    return render_template("analise_regional.html", **_ui_globals())
+    # A planilha CSV atual não traz as seções Estado/Região x Profissão;
+    # contexto vazio mantém a página de pé com o aviso do template
+    return render_template("analise_regional.html",
+                           has_uf=False, has_reg=False,
+                           uf_table=[], reg_table=[],
+                           serie_uf=[], serie_reg=[],
+                           **_ui_globals())
 
 @app.get("/projecao-resultados")
 def projecao_resultados():
     df = get_data()
-    return render_template("projecao_resultados.html", **_ui_globals())
+    derived = get_derived(df)
+    return render_template("projecao_resultados.html",
+                           has_data=bool(derived["projecao_table"]),
+                           table=derived["projecao_table"],
+                           **_ui_globals())
 
 @app.get("/insights-ia")
 def insights_ia():
@@ -282,11 +805,13 @@ def insights_ia():
 @app.get("/debug")
 def debug():
     df = get_data()
-    sample = df.head(20).fillna("").astype(str).to_dict(orient="records")
-    cols = list(range(df.shape[1]))
-    return render_template("debug.html", cols=cols, rows=sample, **_ui_globals())
+    derived = get_derived(df)
+    return render_template("debug.html", cols=derived["debug_cols"],
+                           rows=derived["debug_rows"], **_ui_globals())
 
 # ---------- Execução local ----------
+# Dev server do Werkzeug só para desenvolvimento (FLASK_DEV=1 liga o debug);
+# em produção quem serve é o gunicorn (ver gunicorn_conf.py / render.yaml)
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 5000))
-    app.run(host="0.0.0.0", port=port, debug=True)
+    app.run(host="0.0.0.0", port=port, debug=bool(os.getenv("FLASK_DEV")))
@@ -0,0 +1,8 @@
+# asgi.py — entrada ASGI opcional
+# Permite servir o mesmo app sob uvicorn (ex.: uvicorn asgi:asgi_app --workers 2)
+# como alternativa ao gunicorn+gevent do render.yaml.
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app
+
+asgi_app = WsgiToAsgi(app)
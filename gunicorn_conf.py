@@ -0,0 +1,11 @@
+# gunicorn_conf.py — config de produção (Render)
+# Workers gevent: mantém keep-alive e não trava o worker inteiro enquanto
+# o fetch da planilha (HTTPS Google) está no ar. Exige GEVENT=1 no ambiente
+# para o monkey-patch em app.py acontecer antes do import de requests.
+import multiprocessing
+
+worker_class = "gevent"
+workers = multiprocessing.cpu_count() * 2 + 1
+worker_connections = 1000
+keepalive = 5
+timeout = 60
@@ -5,8 +5,20 @@ import io
 import re
 import json
 from datetime import datetime
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# calamine (Rust) lê XLSX em streaming e é bem mais rápido que o openpyxl;
+# se o wheel não estiver instalado no deploy, seguimos com o openpyxl.
+try:
+    import python_calamine  # noqa: F401
+    _XLSX_ENGINE = "calamine"
+except ImportError:
+    _XLSX_ENGINE = "openpyxl"
 
 # -------------------------------------------------
 # Formatação PT-BR
@@ -26,15 +38,22 @@ def format_ptbr_money(x):
 # -------------------------------------------------
 # Helpers
 # -------------------------------------------------
+# Tabela e regexes do slug compilados 1x no import; _slug_pt roda milhares
+# de vezes sobre um vocabulário pequeno (headers, campos), então o lru_cache
+# transforma as repetições em lookup de dict
+_SLUG_TRANS = str.maketrans("çãáàâäéêèëíìïóôõòöúùü", "caaaaaeeeeiiiooooouuu")
+_SLUG_WS_RE = re.compile(r"\s+")
+_SLUG_JUNK_RE = re.compile(r"[^a-z0-9_]")
+
+@lru_cache(maxsize=4096)
+def _slug_pt_cached(s: str) -> str:
+    s = s.strip().lower().translate(_SLUG_TRANS)
+    return _SLUG_JUNK_RE.sub("", _SLUG_WS_RE.sub("_", s))
+
 def _slug_pt(s: str) -> str:
     if s is None:
         return ""
-    s = str(s).strip().lower()
-    transl = str.maketrans("çãáàâäéêèëíìïóôõòöúùü", "caaaaaeeeeiiiooooouuu")
-    s = s.translate(transl)
-    s = re.sub(r"\s+", "_", s)
-    s = re.sub(r"[^a-z0-9_]", "", s)
-    return s
+    return _slug_pt_cached(str(s))
 
 def _to_number(x):
     if pd.isna(x):
@@ -49,43 +68,96 @@ def _to_number(x):
     except Exception:
         return None
 
+# Session HTTP única do projeto: pool de conexões + retry com backoff.
+# app.py importa daqui para não duplicar a configuração de transporte.
+HTTP_SESSION = requests.Session()
+# gzip/deflate no transporte para todo download (CSV do Sheets comprime ~5-10x)
+HTTP_SESSION.headers.update({"Accept-Encoding": "gzip, deflate"})
+_ADAPTER = HTTPAdapter(
+    pool_connections=10, pool_maxsize=10,
+    max_retries=Retry(total=3, backoff_factor=2,
+                      status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset(["GET", "HEAD"])),
+)
+HTTP_SESSION.mount("https://", _ADAPTER)
+HTTP_SESSION.mount("http://", _ADAPTER)
+
 def _fetch_bytes(url: str) -> bytes:
-    r = requests.get(url, timeout=30)
+    r = HTTP_SESSION.get(url, timeout=30)
     r.raise_for_status()
     return r.content
 
 def _first_sheet_df_from_xlsx_bytes(b: bytes, header="infer") -> pd.DataFrame:
-    xls = pd.ExcelFile(io.BytesIO(b))
-    return pd.read_excel(xls, sheet_name=0, header=header)
+    if _XLSX_ENGINE == "calamine":
+        return pd.read_excel(io.BytesIO(b), sheet_name=0, header=header, engine=_XLSX_ENGINE)
+    # Fallback openpyxl em modo read_only: parser SAX streaming, não monta o
+    # DOM da planilha inteira em memória como o caminho default do read_excel
+    from openpyxl import load_workbook
+    wb = load_workbook(io.BytesIO(b), read_only=True, data_only=True)
+    try:
+        rows = list(wb.worksheets[0].values)
+    finally:
+        wb.close()
+    if header is None or not rows:
+        return pd.DataFrame(rows)
+    return pd.DataFrame(rows[1:], columns=rows[0])
+
+def _norm_grid(df: pd.DataFrame):
+    """Grade inteira -> array numpy <U normalizado (strip/lower, NaN vira "")."""
+    vals = df.astype(str).where(df.notna(), "").values.tolist()
+    arr = np.asarray(vals, dtype=str)
+    return np.char.lower(np.char.strip(arr))
+
+def _dedupe_columns(names):
+    """Sufixa nomes repetidos (_2, _3...) em um passe vetorizado de cumcount.
+
+    Headers duplicados (ou várias células vazias viram o mesmo slug) fariam
+    df[col] devolver um DataFrame em vez de Series no código de consumo."""
+    s = pd.Series([str(n) for n in names], dtype="object")
+    counts = s.groupby(s).cumcount()
+    suffix = np.where(counts > 0, "_" + (counts + 1).astype(str), "")
+    return (s + suffix).tolist()
+
+def _collect_table(df: pd.DataFrame, i: int, max_gap=2):
+    """Coleta as linhas abaixo do header 'i' até estourar max_gap linhas
+    vazias seguidas; devolve (df_tabela, start_row, end_row). Kernel
+    compartilhado por _find_table e pela caça da tabela-pivô."""
+    n = len(df)
+    headers = list(df.iloc[i, :])
+    # Máscara de linhas vazias em um passe vetorizado; o loop só indexa o
+    # array bool em vez de construir uma Series + isna().all() por linha
+    null_rows = df.isna().all(axis=1).to_numpy()
+    rows = []
+    gaps = 0
+    for j in range(i + 1, n):
+        if null_rows[j]:
+            gaps += 1
+            if gaps > max_gap:
+                break
+            else:
+                continue
+        rows.append(list(df.iloc[j, :]))
+    tab = pd.DataFrame(rows, columns=headers).dropna(how="all")
+    # normaliza nomes (e desambigua duplicatas, que quebram seleção por rótulo)
+    tab.columns = _dedupe_columns(_slug_pt(c) for c in tab.columns)
+    return tab, i, i + len(rows)
 
 def _find_table(df: pd.DataFrame, required_cols, max_gap=2):
     """
     Procura, no DataFrame 'df' (sem header), um "miolo" de tabela cuja linha de header
     contenha todas as 'required_cols' (case-insensitive). Retorna (df_tabela, start_row, end_row)
     """
-    req = [c.lower() for c in required_cols]
-    n = len(df)
-    for i in range(n):
-        row = [str(x).strip().lower() for x in list(df.iloc[i, :])]
-        if all(any(rc in str(cell) for cell in row) for rc in req):
-            # Encontrou header em i; coletar linhas seguintes até 2 linhas totalmente vazias
-            headers = list(df.iloc[i, :])
-            rows = []
-            gaps = 0
-            for j in range(i + 1, n):
-                ser = df.iloc[j, :]
-                if ser.isna().all():
-                    gaps += 1
-                    if gaps > max_gap:
-                        break
-                    else:
-                        continue
-                rows.append(list(ser))
-            tab = pd.DataFrame(rows, columns=headers).dropna(how="all")
-            # normaliza nomes
-            tab.columns = [_slug_pt(c) for c in tab.columns]
-            return tab, i, i + len(rows)
-    return None, None, None
+    if not len(df):
+        return None, None, None
+    # Scan vetorizado: normaliza a grade 1x e reduz por linha com numpy,
+    # em vez de reconstruir listas de strings por linha em Python
+    low = _norm_grid(df)
+    mask = np.ones(len(df), dtype=bool)
+    for rc in required_cols:
+        mask &= (np.char.find(low, rc.lower()) >= 0).any(axis=1)
+    if not mask.any():
+        return None, None, None
+    return _collect_table(df, int(np.argmax(mask)), max_gap)
 
 def _kv_from_inputs_sheet(df_infer_header: pd.DataFrame):
     """
@@ -188,25 +260,20 @@ def load_from_xlsx_url_or_path(src: str):
     # Buscar header que contenha "Rótulos de Linha" e alguns canais como 'facebook', 'instagram', etc.
     rotais = ["rótulos de linha", "rotulos de linha", "rótulos de coluna", "rotulos de coluna"]
     canais_suspeitos = ["facebook", "instagram", "youtube", "email", "googlesearch", "manychat", "redirect"]
-    found = None
-    n = len(df_raw)
-    for i in range(n):
-        row = [str(x).strip().lower() for x in list(df_raw.iloc[i, :])]
-        if any(tag in " ".join(row) for tag in rotais) and sum(1 for c in canais_suspeitos if any(c in cell for cell in row)) >= 2:
-            # header provável
-            headers = list(df_raw.iloc[i, :])
-            rows = []
-            for j in range(i + 1, n):
-                ser = df_raw.iloc[j, :]
-                if ser.isna().all():
-                    break
-                rows.append(list(ser))
-            tab = pd.DataFrame(rows, columns=headers).dropna(how="all")
-            tab.columns = [_slug_pt(c) for c in tab.columns]
-            found = tab
-            break
-
-    prof_canais_tab = found
+    # Mesmo scan vetorizado do _find_table: reduz a grade normalizada por
+    # linha em numpy e reaproveita o _collect_table para o miolo (max_gap=0:
+    # a tabela-pivô termina na primeira linha totalmente vazia)
+    prof_canais_tab = None
+    if len(df_raw):
+        low = _norm_grid(df_raw)
+        rot_hit = np.zeros(len(df_raw), dtype=bool)
+        for tag in rotais:
+            rot_hit |= (np.char.find(low, tag) >= 0).any(axis=1)
+        canal_cnt = sum((np.char.find(low, c) >= 0).any(axis=1).astype(int)
+                        for c in canais_suspeitos)
+        mask = rot_hit & (canal_cnt >= 2)
+        if mask.any():
+            prof_canais_tab, _, _ = _collect_table(df_raw, int(np.argmax(mask)), max_gap=0)
 
     return {
         "mode": "xlsx",